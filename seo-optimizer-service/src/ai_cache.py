@@ -0,0 +1,146 @@
+"""Дисковый кеш результатов AI-оптимизации статей"""
+import os
+import json
+import time
+import math
+import hashlib
+import operator
+from typing import List, Optional
+
+from src.atomic_write import write_text_atomic
+
+# Папка кеша и время жизни записи в секундах (0 - кеш отключен)
+CACHE_DIR = os.getenv('SEO_AI_CACHE_DIR', '/tmp/seo-ai-cache')
+CACHE_TTL = int(os.getenv('SEO_AI_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Семантический кеш: почти совпадающие статьи (косинусная близость эмбеддингов
+# не ниже порога) получают результат уже оптимизированной статьи. Каждый промах
+# кеша стоит дополнительного запроса эмбеддинга, поэтому по умолчанию отключен (0);
+# рекомендуемое значение при включении - 0.97
+SEMANTIC_THRESHOLD = float(os.getenv('SEO_SEMANTIC_CACHE_THRESHOLD', '0'))
+SEMANTIC_INDEX_PATH = os.path.join(CACHE_DIR, 'semantic_index.jsonl')
+# Максимум записей индекса в памяти; файл переписывается, когда строк в нем вдвое больше
+SEMANTIC_MAX_ENTRIES = int(os.getenv('SEO_SEMANTIC_CACHE_MAX_ENTRIES', '1000'))
+
+# Записи индекса, прочитанные этим процессом: (время, область, вектор, ключ)
+_semantic_entries = []
+# Позиция чтения, число строк и inode файла индекса (после перезаписи файла читаем заново)
+_semantic_index_offset = 0
+_semantic_index_lines = 0
+_semantic_index_inode = None
+
+def make_key(*parts: str) -> str:
+    """Ключ кеша по модели и входным данным запроса"""
+    # JSON-массив однозначен: разделители внутри частей не сдвигают границы между ними
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f'{key}.json')
+
+def get(key: str) -> Optional[dict]:
+    """Результат из кеша или None, если записи нет или она устарела"""
+    if CACHE_TTL <= 0:
+        return None
+    path = _entry_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def put(key: str, value: dict):
+    """Сохранение результата в кеш (ошибки записи не прерывают обработку)"""
+    if CACHE_TTL <= 0:
+        return
+    path = _entry_path(key)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Ошибка записи кеша AI-оптимизации: {e}")
+
+def semantic_enabled() -> bool:
+    return CACHE_TTL > 0 and SEMANTIC_THRESHOLD > 0
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+def _read_semantic_index():
+    """Дочитывание записей, добавленных в индекс после последнего чтения (в том числе другими процессами)"""
+    global _semantic_entries, _semantic_index_offset, _semantic_index_lines, _semantic_index_inode
+    try:
+        with open(SEMANTIC_INDEX_PATH, 'r', encoding='utf-8') as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != _semantic_index_inode:
+                # Файл перезаписан (компактизация в этом или другом процессе)
+                _semantic_entries = []
+                _semantic_index_offset = _semantic_index_lines = 0
+                _semantic_index_inode = inode
+            f.seek(_semantic_index_offset)
+            for line in f:
+                if not line.endswith('\n'):
+                    # Строка еще дописывается: дочитаем в следующий раз
+                    break
+                _semantic_index_offset += len(line.encode('utf-8'))
+                _semantic_index_lines += 1
+                try:
+                    entry = json.loads(line)
+                    _semantic_entries.append((entry['time'], entry['scope'], entry['vector'], entry['key']))
+                except (ValueError, KeyError):
+                    continue
+    except OSError:
+        pass
+    
+    # Устаревшие записи отбрасываем, из оставшихся держим только самые новые
+    min_time = time.time() - CACHE_TTL
+    _semantic_entries = [entry for entry in _semantic_entries if entry[0] >= min_time][-SEMANTIC_MAX_ENTRIES:]
+
+def _compact_semantic_index():
+    """Перезапись файла индекса только с актуальными записями"""
+    content = ''.join(
+        json.dumps({'time': created_at, 'scope': scope, 'vector': vector, 'key': key}) + '\n'
+        for created_at, scope, vector, key in _semantic_entries
+    )
+    write_text_atomic(SEMANTIC_INDEX_PATH, content)
+    # Следующее чтение увидит новый inode и загрузит файл заново
+
+def find_similar(vector: List[float], scope: str) -> Optional[dict]:
+    """
+    Результат для ближайшей по эмбеддингу статьи из той же области (scope)
+    
+    Линейный перебор не более чем SEMANTIC_MAX_ENTRIES записей: это на порядки быстрее запроса к модели.
+    """
+    if not semantic_enabled():
+        return None
+    _read_semantic_index()
+    vector = _normalize(vector)
+    best_key, best_similarity = None, SEMANTIC_THRESHOLD
+    for created_at, entry_scope, entry_vector, key in _semantic_entries:
+        if entry_scope != scope:
+            continue
+        similarity = sum(map(operator.mul, vector, entry_vector))
+        if similarity >= best_similarity:
+            best_key, best_similarity = key, similarity
+    return get(best_key) if best_key is not None else None
+
+def put_similar(vector: List[float], scope: str, key: str):
+    """Добавление эмбеддинга статьи в индекс; сам результат хранится по key через put"""
+    if not semantic_enabled():
+        return
+    line = json.dumps({'time': time.time(), 'scope': scope, 'vector': _normalize(vector), 'key': key}) + '\n'
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Одна строка пишется одним вызовом write в режиме дозаписи
+        with open(SEMANTIC_INDEX_PATH, 'a', encoding='utf-8') as f:
+            f.write(line)
+        _read_semantic_index()
+        if _semantic_index_lines > 2 * SEMANTIC_MAX_ENTRIES:
+            _compact_semantic_index()
+    except OSError as e:
+        print(f"Ошибка записи семантического кеша: {e}")
@@ -0,0 +1,26 @@
+"""Атомарная запись файлов: временный файл рядом с целевым, fsync и os.replace"""
+import os
+
+# Содержимое файла уходит на диск одним вызовом write
+WRITE_BUFFER_SIZE = 1 << 20
+
+def write_text_atomic(path: str, content: str):
+    """
+    Запись текстового файла целиком
+    
+    При сбое на диске остается либо старая, либо новая версия файла, но не обрезанная.
+    Временный файл создается через open, поэтому права нового файла определяются umask.
+    """
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(content.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,25 @@
+"""Межпроцессная блокировка файлов сайта, которые меняют несколько модулей"""
+import os
+import fcntl
+import hashlib
+from contextlib import contextmanager
+
+# Файлы блокировок лежат вне проекта сайта, чтобы не попасть в public/
+LOCK_DIR = os.getenv('SEO_LOCK_DIR', '/tmp/seo-locks')
+
+@contextmanager
+def locked_file(path: str):
+    """
+    Эксклюзивная блокировка (flock) на время чтения-изменения-записи файла path
+    
+    flock действует между процессами и между потоками одного процесса (у каждого
+    вызова свой дескриптор). Не реентерабельна: вложенный вызов для того же файла зависнет.
+    """
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    name = hashlib.blake2b(os.path.realpath(path).encode('utf-8'), digest_size=8).hexdigest()
+    with open(os.path.join(LOCK_DIR, f'{name}.lock'), 'a') as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
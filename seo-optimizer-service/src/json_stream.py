@@ -0,0 +1,120 @@
+"""Потоковый разбор JSON без загрузки всего тела запроса в память"""
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = frozenset(_WHITESPACE + ',:]}')
+
+class _StreamReader:
+    """Буферизованное чтение JSON-значений из бинарного потока"""
+    
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """Дочитывание следующего фрагмента; False, если поток закончился"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if chunk:
+            text = self.decoder.decode(chunk)
+        else:
+            self.eof = True
+            text = self.decoder.decode(b'', final=True)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Следующий значимый символ или '' в конце потока"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+    
+    def expect(self, char: str, message: str):
+        if self.peek() != char:
+            raise ValueError(message)
+        self.pos += 1
+    
+    def value(self) -> Any:
+        """Чтение одного JSON-значения целиком"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Без разделителя после значения оно может быть оборвано (например, число)
+            if (end == len(self.buffer) or self.buffer[end] not in _DELIMITERS) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+def iter_json_array(stream: BinaryIO, key: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Итератор по элементам массива в поле key JSON-объекта из потока
+    
+    Заголовок объекта разбирается сразу: отсутствие поля или не-массив
+    приводят к ValueError до начала итерации. Остаток объекта после массива
+    проверяется в конце итерации, поэтому некорректное тело тоже дает ValueError.
+    """
+    reader = _StreamReader(stream, chunk_size)
+    reader.expect('{', 'Ожидался JSON-объект')
+    
+    if reader.peek() != '}':
+        while True:
+            if _read_member_name(reader) == key:
+                reader.expect('[', f'{key} должно быть массивом')
+                return _iter_array_items(reader)
+            # Пропускаем остальные поля
+            reader.value()
+            if not _next_member(reader):
+                break
+    
+    raise ValueError(f'Поле {key} обязательно')
+
+def _read_member_name(reader: _StreamReader) -> str:
+    if reader.peek() != '"':
+        raise ValueError('Некорректный JSON-объект')
+    name = reader.value()
+    reader.expect(':', 'Некорректный JSON-объект')
+    return name
+
+def _next_member(reader: _StreamReader) -> bool:
+    """Разделитель после значения поля: True для ',' и False для закрывающей '}'"""
+    char = reader.peek()
+    reader.pos += 1
+    if char == ',':
+        return True
+    if char == '}':
+        return False
+    raise ValueError('Некорректный JSON-объект')
+
+def _iter_array_items(reader: _StreamReader) -> Iterator[Any]:
+    if reader.peek() != ']':
+        while True:
+            yield reader.value()
+            if reader.peek() == ']':
+                break
+            reader.expect(',', 'Некорректный JSON-массив')
+    reader.pos += 1
+    
+    # Остальные поля объекта и конец тела: после объекта допустимы только пробелы
+    while _next_member(reader):
+        _read_member_name(reader)
+        reader.value()
+    if reader.peek() != '':
+        raise ValueError('Лишние данные после JSON-объекта')
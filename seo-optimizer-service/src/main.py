@@ -12,6 +12,8 @@ from src.routes.semantic import semantic_bp
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+# Не сортируем ключи при сериализации JSON-ответов
+app.json.sort_keys = False
 
 # Включаем CORS для всех доменов
 CORS(app)
@@ -0,0 +1,9 @@
+from src.models.user import db
+
+class ProcessedArticle(db.Model):
+    """Статья из отслеживаемой папки, уже опубликованная на сайте"""
+    path = db.Column(db.String(1024), primary_key=True)
+    processed_at = db.Column(db.String(32), nullable=False)
+
+    def __repr__(self):
+        return f'<ProcessedArticle {self.path}>'
@@ -1,6 +1,19 @@
 import os
-from flask import Blueprint, request, jsonify
-from src.semantic_core import SemanticCoreManager, KeywordCluster, KeywordPriority, Keyword
+import re
+import time
+import atexit
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from operator import attrgetter
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from src.atomic_write import write_text_atomic
+from src.file_lock import locked_file
+from src.json_stream import iter_json_array
+from src.semantic_core import (
+    SemanticCoreManager, KeywordCluster, KeywordPriority, Keyword, KEYWORD_CLUSTERS, KEYWORD_PRIORITIES
+)
 
 # Создаем Blueprint для семантического ядра
 semantic_bp = Blueprint('semantic', __name__)
@@ -8,7 +21,90 @@ semantic_bp = Blueprint('semantic', __name__)
 # Инициализируем менеджер семантического ядра
 semantic_manager = SemanticCoreManager()
 
-@semantic_bp.route('/keywords', methods=['GET'])
+# Фоновая запись SEO/GEO файлов: серия изменений сливается в одну запись
+_SEO_UPDATE_DELAY = 0.5  # секунды ожидания перед записью
+_seo_writer = ThreadPoolExecutor(max_workers=1)
+_seo_update_pending = threading.Event()
+atexit.register(_seo_writer.shutdown, wait=True)
+
+# Секция семантического ядра в llms.txt (до следующего заголовка второго уровня)
+_SEMANTIC_SECTION_RE = re.compile(r'^## Семантическое ядро[ \t]*$.*?(?=^## |\Z)', re.DOTALL | re.MULTILINE)
+
+# Тег meta keywords в SEOHead.jsx и приоритеты, попадающие в него
+_META_KEYWORDS_RE = re.compile(r'<meta name="keywords" content="[^"]*"')
+_META_PRIORITIES = frozenset({KeywordPriority.HIGH, KeywordPriority.CRITICAL})
+
+@semantic_bp.before_request
+def _refresh_semantic_core():
+    # Каждый воркер gunicorn держит свою копию ядра: подхватываем изменения других воркеров
+    semantic_manager.refresh()
+
+# Сообщения об ошибках массовой загрузки, форматируются только при ответе
+_BULK_ERROR_MESSAGES = {
+    'empty_phrase': 'пустая фраза',
+    'duplicate': 'ключевое слово "{}" уже существует',
+    'invalid_cluster': 'неверный кластер',
+    'invalid_priority': 'неверный приоритет',
+    'invalid_format': 'неверный формат данных',
+    'exception': '{}'
+}
+# Количество ошибок в ответе без параметра verbose=1
+_BULK_ERROR_SAMPLE_SIZE = 20
+
+def _format_bulk_errors(errors):
+    """Текст ошибок массовой загрузки: все при verbose=1, иначе первые несколько"""
+    if request.args.get('verbose') != '1':
+        errors = errors[:_BULK_ERROR_SAMPLE_SIZE]
+    return [f'Строка {i+1}: ' + _BULK_ERROR_MESSAGES[code].format(arg) for i, code, arg in errors]
+
+# Размер тела, начиная с которого массовая загрузка разбирается потоково
+_STREAM_JSON_THRESHOLD = 1 << 20
+
+def _get_json():
+    """Однократный разбор JSON-тела запроса (результат кешируется Flask)"""
+    # text/json не распознается Flask как JSON, разбираем его принудительно
+    return request.get_json(force=request.mimetype == 'text/json', silent=True, cache=True)
+
+def _lookup_enum(members, value):
+    """Поиск элемента перечисления по значению, None для недопустимого значения"""
+    return members.get(value) if isinstance(value, str) else None
+
+# Поля ключевого слова в ответах API
+_KEYWORD_FIELDS = ('id', 'phrase', 'cluster', 'priority', 'search_volume', 'competition',
+                   'commercial_intent', 'created_at', 'updated_at', 'is_active')
+_get_keyword_fields = attrgetter(*_KEYWORD_FIELDS)
+
+def _serialize_keyword(keyword):
+    """Преобразование ключевого слова в словарь для JSON"""
+    data = dict(zip(_KEYWORD_FIELDS, _get_keyword_fields(keyword)))
+    data['cluster'] = keyword.cluster_value
+    data['priority'] = keyword.priority_value
+    return data
+
+# Количество ключевых слов в одном фрагменте потокового ответа
+_STREAM_CHUNK_SIZE = 500
+
+def _stream_keywords_response(keywords, filters):
+    """Потоковый JSON-ответ со списком ключевых слов без сборки всего ответа в памяти"""
+    dumps = current_app.json.dumps
+    
+    def generate():
+        yield '{"keywords": ['
+        total = 0
+        chunk = []
+        for keyword in keywords:
+            chunk.append(dumps(_serialize_keyword(keyword)))
+            if len(chunk) == _STREAM_CHUNK_SIZE:
+                yield (', ' if total else '') + ', '.join(chunk)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            yield (', ' if total else '') + ', '.join(chunk)
+            total += len(chunk)
+        yield f'], "total": {total}, "filters": {dumps(filters)}}}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 def get_keywords():
     """Получение всех ключевых слов с фильтрацией"""
     try:
@@ -16,62 +112,48 @@ def get_keywords():
         cluster = request.args.get('cluster')
         priority = request.args.get('priority')
         search = request.args.get('search')
+        prefix = request.args.get('prefix')
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         
         # Получаем ключевые слова
         if search:
             keywords = semantic_manager.search_keywords(search)
+        elif prefix:
+            keywords = semantic_manager.search_keywords_by_prefix(prefix)
         elif cluster:
-            try:
-                cluster_enum = KeywordCluster(cluster)
-                keywords = semantic_manager.get_keywords_by_cluster(cluster_enum)
-            except ValueError:
+            cluster_enum = KEYWORD_CLUSTERS.get(cluster)
+            if cluster_enum is None:
                 return jsonify({'error': f'Неверный кластер: {cluster}'}), 400
+            keywords = semantic_manager.get_keywords_by_cluster(cluster_enum)
         elif priority:
-            try:
-                priority_enum = KeywordPriority(priority)
-                keywords = semantic_manager.get_keywords_by_priority(priority_enum)
-            except ValueError:
+            priority_enum = KEYWORD_PRIORITIES.get(priority)
+            if priority_enum is None:
                 return jsonify({'error': f'Неверный приоритет: {priority}'}), 400
+            keywords = semantic_manager.get_keywords_by_priority(priority_enum)
         else:
-            keywords = semantic_manager.get_all_keywords(active_only=active_only)
-        
-        # Преобразуем в словари для JSON
-        keywords_data = []
-        for keyword in keywords:
-            keyword_dict = {
-                'id': keyword.id,
-                'phrase': keyword.phrase,
-                'cluster': keyword.cluster.value,
-                'priority': keyword.priority.value,
-                'search_volume': keyword.search_volume,
-                'competition': keyword.competition,
-                'commercial_intent': keyword.commercial_intent,
-                'created_at': keyword.created_at,
-                'updated_at': keyword.updated_at,
-                'is_active': keyword.is_active
-            }
-            keywords_data.append(keyword_dict)
-        
-        return jsonify({
-            'keywords': keywords_data,
-            'total': len(keywords_data),
-            'filters': {
-                'cluster': cluster,
-                'priority': priority,
-                'search': search,
-                'active_only': active_only
-            }
+            keywords = semantic_manager.iter_all_keywords(active_only=active_only)
+        
+        # Отдаем ключевые слова потоком по мере сериализации
+        return _stream_keywords_response(keywords, {
+            'cluster': cluster,
+            'priority': priority,
+            'search': search,
+            'prefix': prefix,
+            'active_only': active_only
         })
         
     except Exception as e:
         return jsonify({'error': f'Ошибка получения ключевых слов: {str(e)}'}), 500
 
+# Самый нагруженный маршрут: OPTIONS для /keywords отдает правило POST, слеш в конце допускается
+semantic_bp.add_url_rule('/keywords', view_func=get_keywords, methods=['GET'],
+                         provide_automatic_options=False, strict_slashes=False)
+
 @semantic_bp.route('/keywords', methods=['POST'])
 def add_keyword():
     """Добавление нового ключевого слова"""
     try:
-        data = request.get_json()
+        data = _get_json()
         
         if not data or 'phrase' not in data:
             return jsonify({'error': 'Поле phrase обязательно'}), 400
@@ -81,24 +163,20 @@ def add_keyword():
             return jsonify({'error': 'Фраза не может быть пустой'}), 400
         
         # Проверяем, не существует ли уже такая фраза
-        existing_keywords = semantic_manager.search_keywords(phrase)
-        for existing in existing_keywords:
-            if existing.phrase.lower() == phrase.lower():
-                return jsonify({'error': 'Ключевое слово уже существует'}), 409
+        if phrase.casefold() in semantic_manager.phrase_index:
+            return jsonify({'error': 'Ключевое слово уже существует'}), 409
         
         # Получаем дополнительные параметры
         cluster = None
         if 'cluster' in data:
-            try:
-                cluster = KeywordCluster(data['cluster'])
-            except ValueError:
+            cluster = _lookup_enum(KEYWORD_CLUSTERS, data['cluster'])
+            if cluster is None:
                 return jsonify({'error': f'Неверный кластер: {data["cluster"]}'}), 400
         
         priority = None
         if 'priority' in data:
-            try:
-                priority = KeywordPriority(data['priority'])
-            except ValueError:
+            priority = _lookup_enum(KEYWORD_PRIORITIES, data['priority'])
+            if priority is None:
                 return jsonify({'error': f'Неверный приоритет: {data["priority"]}'}), 400
         
         # Дополнительные параметры
@@ -116,22 +194,11 @@ def add_keyword():
         )
         
         # Обновляем SEO/GEO файлы
-        update_seo_files_with_keywords()
+        schedule_seo_files_update()
         
         return jsonify({
             'message': 'Ключевое слово успешно добавлено',
-            'keyword': {
-                'id': keyword.id,
-                'phrase': keyword.phrase,
-                'cluster': keyword.cluster.value,
-                'priority': keyword.priority.value,
-                'search_volume': keyword.search_volume,
-                'competition': keyword.competition,
-                'commercial_intent': keyword.commercial_intent,
-                'created_at': keyword.created_at,
-                'updated_at': keyword.updated_at,
-                'is_active': keyword.is_active
-            }
+            'keyword': _serialize_keyword(keyword)
         }), 201
         
     except Exception as e:
@@ -141,94 +208,107 @@ def add_keyword():
 def add_keywords_bulk():
     """Массовое добавление ключевых слов"""
     try:
-        data = request.get_json()
-        
-        if not data or 'keywords' not in data:
-            return jsonify({'error': 'Поле keywords обязательно'}), 400
-        
-        keywords_data = data['keywords']
-        if not isinstance(keywords_data, list):
-            return jsonify({'error': 'keywords должно быть массивом'}), 400
+        if request.is_json and (request.content_length or 0) > _STREAM_JSON_THRESHOLD:
+            # Большое тело разбираем по элементам, не загружая его целиком
+            try:
+                keywords_data = iter_json_array(request.stream, 'keywords')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            data = _get_json()
+            
+            if not data or 'keywords' not in data:
+                return jsonify({'error': 'Поле keywords обязательно'}), 400
+            
+            keywords_data = data['keywords']
+            if not isinstance(keywords_data, list):
+                return jsonify({'error': 'keywords должно быть массивом'}), 400
         
-        added_keywords = []
+        valid_rows = []
         errors = []
-        
-        for i, keyword_data in enumerate(keywords_data):
-            try:
-                if isinstance(keyword_data, str):
-                    # Простая строка - только фраза
-                    phrase = keyword_data.strip()
-                    if phrase:
-                        keyword = semantic_manager.add_keyword(phrase=phrase)
-                        added_keywords.append({
-                            'id': keyword.id,
-                            'phrase': keyword.phrase,
-                            'cluster': keyword.cluster.value,
-                            'priority': keyword.priority.value
-                        })
-                elif isinstance(keyword_data, dict) and 'phrase' in keyword_data:
-                    # Объект с дополнительными параметрами
-                    phrase = keyword_data['phrase'].strip()
-                    if not phrase:
-                        errors.append(f'Строка {i+1}: пустая фраза')
-                        continue
-                    
-                    # Проверяем дубликаты
-                    existing_keywords = semantic_manager.search_keywords(phrase)
-                    if any(existing.phrase.lower() == phrase.lower() for existing in existing_keywords):
-                        errors.append(f'Строка {i+1}: ключевое слово "{phrase}" уже существует')
-                        continue
-                    
-                    cluster = None
-                    if 'cluster' in keyword_data:
-                        try:
-                            cluster = KeywordCluster(keyword_data['cluster'])
-                        except ValueError:
-                            errors.append(f'Строка {i+1}: неверный кластер')
+        processed = 0
+        # Фразы, добавленные в этом запросе; уже известные проверяются по индексу ядра
+        phrase_index = semantic_manager.phrase_index
+        seen = set()
+        
+        # Для потокового разбора ошибки JSON в середине тела возникают при итерации
+        try:
+            for i, keyword_data in enumerate(keywords_data):
+                processed += 1
+                try:
+                    if isinstance(keyword_data, str):
+                        # Простая строка - только фраза
+                        phrase = keyword_data.strip()
+                        if phrase:
+                            phrase_cf = phrase.casefold()
+                            if phrase_cf in phrase_index or phrase_cf in seen:
+                                errors.append((i, 'duplicate', phrase))
+                                continue
+                            seen.add(phrase_cf)
+                            valid_rows.append({'phrase': phrase})
+                    elif isinstance(keyword_data, dict) and 'phrase' in keyword_data:
+                        # Объект с дополнительными параметрами
+                        phrase = keyword_data['phrase'].strip()
+                        if not phrase:
+                            errors.append((i, 'empty_phrase', ''))
                             continue
-                    
-                    priority = None
-                    if 'priority' in keyword_data:
-                        try:
-                            priority = KeywordPriority(keyword_data['priority'])
-                        except ValueError:
-                            errors.append(f'Строка {i+1}: неверный приоритет')
+                        
+                        # Проверяем дубликаты
+                        phrase_cf = phrase.casefold()
+                        if phrase_cf in phrase_index or phrase_cf in seen:
+                            errors.append((i, 'duplicate', phrase))
                             continue
-                    
-                    kwargs = {}
-                    for field in ['search_volume', 'competition', 'commercial_intent']:
-                        if field in keyword_data:
-                            kwargs[field] = keyword_data[field]
-                    
-                    keyword = semantic_manager.add_keyword(
-                        phrase=phrase,
-                        cluster=cluster,
-                        priority=priority,
-                        **kwargs
-                    )
-                    
-                    added_keywords.append({
-                        'id': keyword.id,
-                        'phrase': keyword.phrase,
-                        'cluster': keyword.cluster.value,
-                        'priority': keyword.priority.value
-                    })
-                else:
-                    errors.append(f'Строка {i+1}: неверный формат данных')
-                    
-            except Exception as e:
-                errors.append(f'Строка {i+1}: {str(e)}')
+                        
+                        cluster = None
+                        if 'cluster' in keyword_data:
+                            cluster = _lookup_enum(KEYWORD_CLUSTERS, keyword_data['cluster'])
+                            if cluster is None:
+                                errors.append((i, 'invalid_cluster', ''))
+                                continue
+                        
+                        priority = None
+                        if 'priority' in keyword_data:
+                            priority = _lookup_enum(KEYWORD_PRIORITIES, keyword_data['priority'])
+                            if priority is None:
+                                errors.append((i, 'invalid_priority', ''))
+                                continue
+                        
+                        row = {'phrase': phrase, 'cluster': cluster, 'priority': priority}
+                        for field in ['search_volume', 'competition', 'commercial_intent']:
+                            if field in keyword_data:
+                                row[field] = keyword_data[field]
+                        
+                        seen.add(phrase_cf)
+                        valid_rows.append(row)
+                    else:
+                        errors.append((i, 'invalid_format', ''))
+                        
+                except Exception as e:
+                    errors.append((i, 'exception', str(e)))
+        except ValueError as e:
+            return jsonify({'error': f'Некорректный JSON: {str(e)}'}), 400
+        
+        # Добавляем все валидные ключевые слова одним сохранением
+        added_keywords = [
+            {
+                'id': keyword.id,
+                'phrase': keyword.phrase,
+                'cluster': keyword.cluster_value,
+                'priority': keyword.priority_value
+            }
+            for keyword in semantic_manager.add_keywords_bulk(valid_rows)
+        ]
         
         # Обновляем SEO/GEO файлы если были добавлены ключевые слова
         if added_keywords:
-            update_seo_files_with_keywords()
+            schedule_seo_files_update()
         
         return jsonify({
-            'message': f'Обработано {len(keywords_data)} ключевых слов',
+            'message': f'Обработано {processed} ключевых слов',
             'added': len(added_keywords),
             'errors': len(errors),
             'added_keywords': added_keywords,
-            'error_details': errors
+            'error_details': _format_bulk_errors(errors)
         }), 201 if added_keywords else 400
         
     except Exception as e:
@@ -244,18 +324,7 @@ def get_keyword(keyword_id):
             return jsonify({'error': 'Ключевое слово не найдено'}), 404
         
         return jsonify({
-            'keyword': {
-                'id': keyword.id,
-                'phrase': keyword.phrase,
-                'cluster': keyword.cluster.value,
-                'priority': keyword.priority.value,
-                'search_volume': keyword.search_volume,
-                'competition': keyword.competition,
-                'commercial_intent': keyword.commercial_intent,
-                'created_at': keyword.created_at,
-                'updated_at': keyword.updated_at,
-                'is_active': keyword.is_active
-            }
+            'keyword': _serialize_keyword(keyword)
         })
         
     except Exception as e:
@@ -265,7 +334,7 @@ def get_keyword(keyword_id):
 def update_keyword(keyword_id):
     """Обновление ключевого слова"""
     try:
-        data = request.get_json()
+        data = _get_json()
         
         if not data:
             return jsonify({'error': 'Нет данных для обновления'}), 400
@@ -285,15 +354,13 @@ def update_keyword(keyword_id):
             updates['phrase'] = phrase
         
         if 'cluster' in data:
-            try:
-                updates['cluster'] = KeywordCluster(data['cluster'])
-            except ValueError:
+            updates['cluster'] = _lookup_enum(KEYWORD_CLUSTERS, data['cluster'])
+            if updates['cluster'] is None:
                 return jsonify({'error': f'Неверный кластер: {data["cluster"]}'}), 400
         
         if 'priority' in data:
-            try:
-                updates['priority'] = KeywordPriority(data['priority'])
-            except ValueError:
+            updates['priority'] = _lookup_enum(KEYWORD_PRIORITIES, data['priority'])
+            if updates['priority'] is None:
                 return jsonify({'error': f'Неверный приоритет: {data["priority"]}'}), 400
         
         # Дополнительные поля
@@ -308,22 +375,11 @@ def update_keyword(keyword_id):
             return jsonify({'error': 'Ошибка обновления ключевого слова'}), 500
         
         # Обновляем SEO/GEO файлы
-        update_seo_files_with_keywords()
+        schedule_seo_files_update()
         
         return jsonify({
             'message': 'Ключевое слово успешно обновлено',
-            'keyword': {
-                'id': updated_keyword.id,
-                'phrase': updated_keyword.phrase,
-                'cluster': updated_keyword.cluster.value,
-                'priority': updated_keyword.priority.value,
-                'search_volume': updated_keyword.search_volume,
-                'competition': updated_keyword.competition,
-                'commercial_intent': updated_keyword.commercial_intent,
-                'created_at': updated_keyword.created_at,
-                'updated_at': updated_keyword.updated_at,
-                'is_active': updated_keyword.is_active
-            }
+            'keyword': _serialize_keyword(updated_keyword)
         })
         
     except Exception as e:
@@ -345,7 +401,7 @@ def delete_keyword(keyword_id):
             return jsonify({'error': 'Ошибка удаления ключевого слова'}), 500
         
         # Обновляем SEO/GEO файлы
-        update_seo_files_with_keywords()
+        schedule_seo_files_update()
         
         return jsonify({
             'message': 'Ключевое слово успешно удалено',
@@ -359,23 +415,14 @@ def delete_keyword(keyword_id):
 def get_statistics():
     """Получение статистики по семантическому ядру"""
     try:
-        cluster_stats = semantic_manager.get_cluster_statistics()
-        
-        # Статистика по приоритетам
-        priority_stats = {}
-        for priority in KeywordPriority:
-            priority_stats[priority.value] = len(semantic_manager.get_keywords_by_priority(priority))
-        
-        # Общая статистика
-        all_keywords = semantic_manager.get_all_keywords(active_only=False)
-        active_keywords = semantic_manager.get_all_keywords(active_only=True)
+        counts = semantic_manager.get_counts()
         
         return jsonify({
-            'total_keywords': len(all_keywords),
-            'active_keywords': len(active_keywords),
-            'inactive_keywords': len(all_keywords) - len(active_keywords),
-            'cluster_distribution': cluster_stats,
-            'priority_distribution': priority_stats,
+            'total_keywords': counts['total'],
+            'active_keywords': counts['active'],
+            'inactive_keywords': counts['inactive'],
+            'cluster_distribution': counts['cluster_distribution'],
+            'priority_distribution': counts['priority_distribution'],
             'clusters': [cluster.value for cluster in KeywordCluster],
             'priorities': [priority.value for priority in KeywordPriority]
         })
@@ -383,12 +430,27 @@ def get_statistics():
     except Exception as e:
         return jsonify({'error': f'Ошибка получения статистики: {str(e)}'}), 500
 
+def schedule_seo_files_update():
+    """Планирование обновления SEO/GEO файлов, если оно еще не запланировано"""
+    if not _seo_update_pending.is_set():
+        _seo_update_pending.set()
+        _seo_writer.submit(_run_seo_files_update)
+
+def _run_seo_files_update():
+    # Изменения, пришедшие за время ожидания, попадут в эту же запись
+    time.sleep(_SEO_UPDATE_DELAY)
+    # Сбрасываем флаг до записи, чтобы изменения во время записи запланировали новую
+    _seo_update_pending.clear()
+    update_seo_files_with_keywords()
+
 def update_seo_files_with_keywords():
     """Обновление SEO/GEO файлов с учетом семантического ядра"""
     try:
-        # Получаем все активные ключевые слова
-        keywords = semantic_manager.get_all_keywords(active_only=True)
+        # Получаем все активные ключевые слова (снимок, безопасный для фонового потока)
+        keywords = [kw for kw in semantic_manager.get_all_keywords(active_only=False) if kw.is_active]
         
+        # Файлы общие для всех воркеров: состояние процесса не показывает, что в них записано,
+        # поэтому всегда сравниваем с содержимым на диске (запись пропускается, если оно совпадает)
         # Обновляем llms.txt
         update_llms_txt(keywords)
         
@@ -407,50 +469,32 @@ def update_llms_txt(keywords):
         llms_path = os.path.join('/root/call-intellect-site', 'public', 'llms.txt')
         
         # Группируем ключевые слова по кластерам
-        clustered_keywords = {}
+        clustered_keywords = defaultdict(list)
         for keyword in keywords:
-            cluster = keyword.cluster.value
-            if cluster not in clustered_keywords:
-                clustered_keywords[cluster] = []
-            clustered_keywords[cluster].append(keyword.phrase)
-        
-        # Читаем существующий файл
-        existing_content = ""
-        if os.path.exists(llms_path):
-            with open(llms_path, 'r', encoding='utf-8') as f:
-                existing_content = f.read()
-        
-        # Добавляем секцию с семантическим ядром
-        semantic_section = "\n\n## Семантическое ядро\n\n"
-        
-        for cluster, phrases in clustered_keywords.items():
-            semantic_section += f"### {cluster.title()}\n"
-            for phrase in sorted(phrases):
-                semantic_section += f"- {phrase}\n"
-            semantic_section += "\n"
-        
-        # Проверяем, есть ли уже секция семантического ядра
-        if "## Семантическое ядро" in existing_content:
-            # Заменяем существующую секцию
-            lines = existing_content.split('\n')
-            new_lines = []
-            skip_section = False
+            clustered_keywords[keyword.cluster_value].append(keyword.phrase)
+        
+        # Чтение и запись под общей блокировкой: ссылки на статьи блога дописываются в этот же файл из seo.py
+        with locked_file(llms_path):
+            # Читаем существующий файл
+            existing_content = ""
+            if os.path.exists(llms_path):
+                with open(llms_path, 'r', encoding='utf-8') as f:
+                    existing_content = f.read()
             
-            for line in lines:
-                if line.strip() == "## Семантическое ядро":
-                    skip_section = True
-                    break
-                new_lines.append(line)
+            # Формируем секцию с семантическим ядром
+            parts = ["\n\n## Семантическое ядро\n\n"]
+            for cluster, phrases in clustered_keywords.items():
+                parts.append(f"### {cluster.title()}\n")
+                parts.extend(f"- {phrase}\n" for phrase in sorted(phrases))
+                parts.append("\n")
+            semantic_section = ''.join(parts)
             
-            # Добавляем новую секцию
-            new_content = '\n'.join(new_lines) + semantic_section
-        else:
-            # Добавляем секцию в конец
-            new_content = existing_content + semantic_section
-        
-        # Записываем обновленный файл
-        with open(llms_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+            # Удаляем прежнюю секцию семантического ядра (остальные секции сохраняются)
+            new_content = _SEMANTIC_SECTION_RE.sub('', existing_content).rstrip() + semantic_section
+            
+            # Записываем обновленный файл, только если содержимое изменилось
+            if new_content != existing_content:
+                write_text_atomic(llms_path, new_content)
             
     except Exception as e:
         print(f"Ошибка обновления llms.txt: {e}")
@@ -458,12 +502,8 @@ def update_llms_txt(keywords):
 def update_site_metadata(keywords):
     """Обновление метаданных сайта с новыми ключевыми словами"""
     try:
-        # Получаем высокоприоритетные ключевые слова для метаданных
-        high_priority_keywords = [kw.phrase for kw in keywords 
-                                if kw.priority in [KeywordPriority.HIGH, KeywordPriority.CRITICAL]]
-        
-        # Формируем строку ключевых слов для meta keywords
-        meta_keywords = ', '.join(high_priority_keywords[:20])  # Ограничиваем 20 ключевыми словами
+        # Формируем строку ключевых слов для meta keywords из высокоприоритетных (не более 20)
+        meta_keywords = ', '.join(islice((kw.phrase for kw in keywords if kw.priority in _META_PRIORITIES), 20))
         
         # Обновляем SEOHead.jsx
         seo_head_path = os.path.join('/root/call-intellect-site', 'src', 'components', 'SEOHead.jsx')
@@ -472,18 +512,13 @@ def update_site_metadata(keywords):
             with open(seo_head_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            # Обновляем meta keywords (простая замена)
-            import re
-            
-            # Ищем строку с meta keywords и заменяем её
-            keywords_pattern = r'<meta name="keywords" content="[^"]*"'
+            # Ищем строку с meta keywords и заменяем её (функция-замена не трактует "\" в фразах)
             new_keywords_meta = f'<meta name="keywords" content="{meta_keywords}"'
+            new_content = _META_KEYWORDS_RE.sub(lambda match: new_keywords_meta, content, count=1)
             
-            if re.search(keywords_pattern, content):
-                content = re.sub(keywords_pattern, new_keywords_meta, content)
-            
-            with open(seo_head_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Записываем файл, только если тег meta keywords изменился
+            if new_content != content:
+                write_text_atomic(seo_head_path, new_content)
                 
     except Exception as e:
         print(f"Ошибка обновления метаданных сайта: {e}")
@@ -1,11 +1,25 @@
 import os
+import re
+import asyncio
+import atexit
 import json
+import mmap
+import pwd
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from flask import Blueprint, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+import httpx
 import openai
+from src import ai_cache
+from src.atomic_write import write_text_atomic
+from src.file_lock import locked_file
+from src.models.processed_article import ProcessedArticle
+from src.models.user import db
+from src.transliteration import TRANSLIT_TABLE
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -16,19 +30,69 @@ seo_bp = Blueprint('seo', __name__)
 UPLOAD_FOLDER = '/tmp/uploads'
 ALLOWED_EXTENSIONS = {'txt', 'md', 'jpg', 'jpeg', 'png', 'gif', 'webp'}
 REACT_PROJECT_PATH = '/root/call-intellect-site'
+UPLOAD_BUFFER_SIZE = 1 << 20
+# Ограничение размера запроса с изображением статьи (только для optimize-article)
+ARTICLE_MAX_CONTENT_LENGTH = 32 * 1024 * 1024
+OPENAI_MODEL = 'gpt-4o-mini'
+EMBEDDING_MODEL = 'text-embedding-3-small'
+# Для семантического кеша сравниваются заголовок и начало статьи
+SEMANTIC_CACHE_PREFIX_LENGTH = 512
+# Максимум одновременных запросов к OpenAI при обработке папки
+OPENAI_CONCURRENCY = int(os.getenv('SEO_CONCURRENCY', '8'))
+# Сколько статей из папки отправляется в одном запросе к OpenAI
+OPENAI_BATCH_SIZE = int(os.getenv('SEO_BATCH_SIZE', '8'))
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+
+# Фоновое копирование загруженных изображений в проект
+_image_copier = ThreadPoolExecutor(max_workers=4)
+atexit.register(_image_copier.shutdown, wait=True)
+
+# Клиент OpenAI создается лениво, уже в процессе воркера (после fork при preload_app)
+_openai_client = None
 
 # Создаем папку для загрузок если её нет
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Закрывающий тег sitemap.xml ищется в последних SITEMAP_TAIL_SIZE байтах файла
+SITEMAP_END_TAG = b'</urlset>'
+SITEMAP_TAIL_SIZE = 4096
+# Заголовок раздела со статьями блога в llms.txt
+LLMS_BLOG_HEADER = b'## Blog Articles'
+# Размер пакета путей в одном запросе к манифесту обработанных статей
+PROCESSED_QUERY_BATCH_SIZE = 500
+# Общие для всех статей поля Schema.org и их JSON без закрывающей скобки
+SCHEMA_ORG_COMMON = {
+    "@context": "https://schema.org",
+    "@type": "Article",
+    "author": {"@type": "Person", "name": "Call-Intellect"},
+    "publisher": {"@type": "Organization", "name": "Call-Intellect"}
+}
+SCHEMA_ORG_COMMON_PREFIX = json.dumps(SCHEMA_ORG_COMMON, ensure_ascii=False)[:-1]
+
+# Файл задания cron для автоматического мониторинга папки
+CRON_FILE_PATH = '/etc/cron.d/seo-monitor'
+
+# Очистка slug после транслитерации
+SLUG_INVALID_CHARS_RE = re.compile(r'[^a-z0-9\s-]')
+SLUG_SPACES_RE = re.compile(r'\s+')
+SLUG_DASHES_RE = re.compile(r'-+')
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def get_openai_client():
     """Получаем клиент OpenAI с безопасным хранением ключа"""
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY не найден в переменных окружения")
-    return openai.OpenAI(api_key=api_key)
+    global _openai_client
+    if _openai_client is None:
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY не найден в переменных окружения")
+        # Один клиент на процесс: соединения с API (TCP + TLS) переиспользуются между запросами
+        _openai_client = openai.OpenAI(
+            api_key=api_key,
+            http_client=openai.DefaultHttpxClient(limits=OPENAI_HTTP_LIMITS)
+        )
+    return _openai_client
 
 @seo_bp.route('/health', methods=['GET'])
 def health_check():
@@ -39,6 +103,22 @@ def health_check():
         'timestamp': datetime.now().isoformat()
     })
 
+@seo_bp.before_request
+def limit_article_upload_size():
+    # Лимит применяется только к загрузке статьи: массовая загрузка ключевых слов в другом blueprint не ограничена
+    if request.endpoint != 'seo.optimize_article':
+        return None
+    if request.content_length is not None and request.content_length > ARTICLE_MAX_CONTENT_LENGTH:
+        return article_too_large_response()
+    # Для тела без Content-Length лимит проверит парсер формы
+    request.max_content_length = ARTICLE_MAX_CONTENT_LENGTH
+    return None
+
+def article_too_large_response():
+    return jsonify({
+        'error': f'Размер запроса превышает {ARTICLE_MAX_CONTENT_LENGTH // (1024 * 1024)} МБ'
+    }), 413
+
 @seo_bp.route('/optimize-article', methods=['POST'])
 def optimize_article():
     """
@@ -74,7 +154,8 @@ def optimize_article():
             if file and file.filename and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
                 image_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(image_path)
+                # Копируем крупными блоками вместо 16 КБ по умолчанию
+                file.save(image_path, buffer_size=UPLOAD_BUFFER_SIZE)
         
         # Оптимизируем контент с помощью OpenAI
         optimized_data = optimize_content_with_ai(title, content, keywords)
@@ -104,6 +185,8 @@ def optimize_article():
             }
         })
         
+    except RequestEntityTooLarge:
+        return article_too_large_response()
     except Exception as e:
         return jsonify({
             'error': f'Ошибка при обработке статьи: {str(e)}'
@@ -111,26 +194,15 @@ def optimize_article():
 
 def generate_slug(title):
     """Генерирует URL-slug из заголовка"""
-    import re
     # Транслитерация русских букв
-    translit_dict = {
-        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-        'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-        'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-        'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-        'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya'
-    }
-    
-    slug = title.lower()
-    for ru, en in translit_dict.items():
-        slug = slug.replace(ru, en)
+    slug = title.lower().translate(TRANSLIT_TABLE)
     
     # Удаляем все кроме букв, цифр и пробелов
-    slug = re.sub(r'[^a-z0-9\s-]', '', slug)
+    slug = SLUG_INVALID_CHARS_RE.sub('', slug)
     # Заменяем пробелы на дефисы
-    slug = re.sub(r'\s+', '-', slug)
+    slug = SLUG_SPACES_RE.sub('-', slug)
     # Удаляем множественные дефисы
-    slug = re.sub(r'-+', '-', slug)
+    slug = SLUG_DASHES_RE.sub('-', slug)
     # Убираем дефисы в начале и конце
     slug = slug.strip('-')
     
@@ -140,21 +212,9 @@ def generate_slug(title):
     
     return slug
 
-def optimize_content_with_ai(title, content, keywords):
-    """Оптимизирует контент с помощью OpenAI API"""
-    try:
-        client = get_openai_client()
-        
-        prompt = f"""
-        Ты - эксперт по SEO и GEO (Generative Engine Optimization). 
-        Оптимизируй следующую статью для поисковых систем и AI-моделей.
-        
-        Заголовок: {title}
-        Контент: {content}
-        Ключевые слова: {keywords}
-        
-        Верни JSON с следующими полями:
-        {{
+def optimization_result_spec():
+    """Описание JSON-полей результата оптимизации для промпта"""
+    return f"""{{
             "title": "оптимизированный заголовок (до 60 символов)",
             "description": "мета-описание (до 160 символов)",
             "keywords": ["список", "ключевых", "слов"],
@@ -171,41 +231,223 @@ def optimize_content_with_ai(title, content, keywords):
             "h1": "оптимизированный H1 заголовок",
             "h2_suggestions": ["предложения", "для", "подзаголовков"],
             "content_structure": "рекомендации по структуре контента для GEO"
-        }}
+        }}"""
+
+def build_optimization_messages(title, content, keywords):
+    """Сообщения для запроса SEO/GEO оптимизации статьи к OpenAI"""
+    prompt = f"""
+        Ты - эксперт по SEO и GEO (Generative Engine Optimization). 
+        Оптимизируй следующую статью для поисковых систем и AI-моделей.
+        
+        Заголовок: {title}
+        Контент: {content}
+        Ключевые слова: {keywords}
+        
+        Верни JSON с следующими полями:
+        {optimization_result_spec()}
+        """
+    return [
+        {"role": "system", "content": "Ты эксперт по SEO и GEO оптимизации. Отвечай только в формате JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+def build_batch_optimization_messages(articles):
+    """Сообщения для оптимизации нескольких статей [(title, content, keywords)] одним запросом"""
+    articles_json = json.dumps([
+        {'id': index, 'title': title, 'content': content, 'keywords': keywords}
+        for index, (title, content, keywords) in enumerate(articles)
+    ], ensure_ascii=False)
+    prompt = f"""
+        Ты - эксперт по SEO и GEO (Generative Engine Optimization). 
+        Оптимизируй каждую статью из JSON-массива ниже для поисковых систем и AI-моделей.
+        
+        Статьи: {articles_json}
+        
+        Верни JSON-объект {{"articles": [...]}}, где для каждой статьи в том же порядке
+        указан ее "id" и следующие поля:
+        {optimization_result_spec()}
         """
+    return [
+        {"role": "system", "content": "Ты эксперт по SEO и GEO оптимизации. Отвечай только в формате JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+def fallback_optimization(title, content, keywords):
+    """Базовая оптимизация без AI (при ошибке или недоступности OpenAI)"""
+    return {
+        "title": title[:60],
+        "description": content[:160] + "..." if len(content) > 160 else content,
+        "keywords": keywords.split(',') if keywords else [],
+        "schema_org": {
+            "@context": "https://schema.org",
+            "@type": "Article",
+            "headline": title,
+            "description": content[:160],
+            "author": {"@type": "Person", "name": "Call-Intellect"},
+            "publisher": {"@type": "Organization", "name": "Call-Intellect"},
+            "datePublished": datetime.now().isoformat(),
+            "dateModified": datetime.now().isoformat()
+        },
+        "h1": title,
+        "h2_suggestions": [],
+        "content_structure": "Структурируйте контент в формате вопрос-ответ для лучшей GEO оптимизации"
+    }
+
+def optimize_content_with_ai(title, content, keywords):
+    """Оптимизирует контент с помощью OpenAI API"""
+    try:
+        # Повторная обработка той же статьи берется из кеша без запроса к API
+        cache_key = ai_cache.make_key(OPENAI_MODEL, title, content, keywords)
+        cached_result = ai_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
+        client = get_openai_client()
+        
+        # Почти совпадающая статья (правки в CMS) берется из семантического кеша
+        embedding = get_cache_embedding(client, title, content)
+        if embedding is not None:
+            similar_result = ai_cache.find_similar(embedding, keywords)
+            if similar_result is not None:
+                return similar_result
         
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Ты эксперт по SEO и GEO оптимизации. Отвечай только в формате JSON."},
-                {"role": "user", "content": prompt}
-            ],
+            model=OPENAI_MODEL,
+            messages=build_optimization_messages(title, content, keywords),
             temperature=0.3
         )
         
         result = json.loads(response.choices[0].message.content)
+        ai_cache.put(cache_key, result)
+        if embedding is not None:
+            ai_cache.put_similar(embedding, keywords, cache_key)
         return result
         
     except Exception as e:
         # Возвращаем базовую оптимизацию в случае ошибки
-        return {
-            "title": title[:60],
-            "description": content[:160] + "..." if len(content) > 160 else content,
-            "keywords": keywords.split(',') if keywords else [],
-            "schema_org": {
-                "@context": "https://schema.org",
-                "@type": "Article",
-                "headline": title,
-                "description": content[:160],
-                "author": {"@type": "Person", "name": "Call-Intellect"},
-                "publisher": {"@type": "Organization", "name": "Call-Intellect"},
-                "datePublished": datetime.now().isoformat(),
-                "dateModified": datetime.now().isoformat()
-            },
-            "h1": title,
-            "h2_suggestions": [],
-            "content_structure": "Структурируйте контент в формате вопрос-ответ для лучшей GEO оптимизации"
-        }
+        return fallback_optimization(title, content, keywords)
+
+def get_cache_embedding(client, title, content):
+    """Эмбеддинг заголовка и начала статьи для семантического кеша (None, если кеш отключен или запрос не удался)"""
+    if not ai_cache.semantic_enabled():
+        return None
+    try:
+        response = client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=f"{title}\n{content[:SEMANTIC_CACHE_PREFIX_LENGTH]}"
+        )
+        return response.data[0].embedding
+    except Exception as e:
+        return None
+
+async def optimize_content_with_ai_async(client, semaphore, title, content, keywords):
+    """Асинхронная версия optimize_content_with_ai для пакетной обработки"""
+    try:
+        cache_key = ai_cache.make_key(OPENAI_MODEL, title, content, keywords)
+        cached_result = ai_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
+        if client is None:
+            return fallback_optimization(title, content, keywords)
+        
+        # Семафор ограничивает число одновременных запросов к API
+        async with semaphore:
+            response = await client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=build_optimization_messages(title, content, keywords),
+                temperature=0.3
+            )
+        
+        result = json.loads(response.choices[0].message.content)
+        ai_cache.put(cache_key, result)
+        return result
+        
+    except Exception as e:
+        return fallback_optimization(title, content, keywords)
+
+async def optimize_content_batch(client, semaphore, articles):
+    """
+    Оптимизация нескольких статей [(title, content, keywords)] одним запросом к API
+    
+    Системный промпт и инструкции оплачиваются один раз на пакет. Статьи из кеша
+    в запрос не попадают; пропущенные моделью статьи оптимизируются по одной.
+    """
+    results = [None] * len(articles)
+    cache_keys = [ai_cache.make_key(OPENAI_MODEL, *article) for article in articles]
+    pending = []
+    for index, cache_key in enumerate(cache_keys):
+        results[index] = ai_cache.get(cache_key)
+        if results[index] is None:
+            pending.append(index)
+    
+    if client is not None and len(pending) > 1:
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=build_batch_optimization_messages([articles[index] for index in pending]),
+                    response_format={"type": "json_object"},
+                    temperature=0.3
+                )
+            
+            batch_results = json.loads(response.choices[0].message.content).get('articles', [])
+            for item in batch_results:
+                position = item.pop('id', None) if isinstance(item, dict) else None
+                if isinstance(position, int) and 0 <= position < len(pending):
+                    index = pending[position]
+                    results[index] = item
+                    ai_cache.put(cache_keys[index], item)
+        except Exception as e:
+            pass
+    
+    missing = [index for index in pending if results[index] is None]
+    single_results = await asyncio.gather(*[
+        optimize_content_with_ai_async(client, semaphore, *articles[index])
+        for index in missing
+    ])
+    for index, result in zip(missing, single_results):
+        results[index] = result
+    return results
+
+async def optimize_articles_async(articles):
+    """Оптимизация списка статей (title, content) пакетами по OPENAI_BATCH_SIZE; пакеты выполняются параллельно"""
+    api_key = os.getenv('OPENAI_API_KEY')
+    client = openai.AsyncOpenAI(api_key=api_key) if api_key else None
+    semaphore = asyncio.Semaphore(OPENAI_CONCURRENCY)
+    batches = [
+        [(title, content, '') for title, content in articles[start:start + OPENAI_BATCH_SIZE]]
+        for start in range(0, len(articles), OPENAI_BATCH_SIZE)
+    ]
+    try:
+        batch_results = await asyncio.gather(*[
+            optimize_content_batch(client, semaphore, batch)
+            for batch in batches
+        ])
+        return [result for results in batch_results for result in results]
+    finally:
+        if client is not None:
+            await client.close()
+
+def schema_org_json(schema_org):
+    """JSON разметки Schema.org для компонента; стандартная часть разметки берется готовой строкой"""
+    if not isinstance(schema_org, dict):
+        return json.dumps(schema_org, ensure_ascii=False)
+    if not all(schema_org.get(key) == value for key, value in SCHEMA_ORG_COMMON.items()):
+        return json.dumps(schema_org, ensure_ascii=False)
+    
+    # Кодируются только поля статьи (заголовок, описание, даты)
+    article_fields = {key: value for key, value in schema_org.items() if key not in SCHEMA_ORG_COMMON}
+    if not article_fields:
+        return SCHEMA_ORG_COMMON_PREFIX + '}'
+    return SCHEMA_ORG_COMMON_PREFIX + ', ' + json.dumps(article_fields, ensure_ascii=False)[1:]
+
+def copy_image(image_path, dest_path):
+    """Копирование изображения в проект (в фоновом потоке; на Linux copy2 копирует через os.sendfile)"""
+    try:
+        shutil.copy2(image_path, dest_path)
+    except OSError as e:
+        print(f"Ошибка копирования изображения {image_path}: {e}")
 
 def create_article_component(title, content, slug, optimized_data, image_path=None):
     """Создает React-компонент для статьи"""
@@ -216,7 +458,8 @@ def create_article_component(title, content, slug, optimized_data, image_path=No
         image_filename = os.path.basename(image_path)
         dest_path = os.path.join(REACT_PROJECT_PATH, 'public', 'images', image_filename)
         os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-        shutil.copy2(image_path, dest_path)
+        # Страница ссылается на изображение только по URL: ответ не ждет окончания копирования
+        _image_copier.submit(copy_image, image_path, dest_path)
         image_src = f"/images/{image_filename}"
     
     # Создаем содержимое React-компонента
@@ -224,7 +467,7 @@ def create_article_component(title, content, slug, optimized_data, image_path=No
 import SEOHead from '../../components/SEOHead'
 
 const {slug.replace('-', '').title()}Article = () => {{
-  const schemaOrg = {json.dumps(optimized_data.get('schema_org', {}), indent=4, ensure_ascii=False)}
+  const schemaOrg = {schema_org_json(optimized_data.get('schema_org', {}))}
 
   return (
     <div className="min-h-screen">
@@ -285,20 +528,41 @@ export default {slug.replace('-', '').title()}Article
     
     # Сохраняем компонент
     component_path = os.path.join(blog_dir, f'{slug}.jsx')
-    with open(component_path, 'w', encoding='utf-8') as f:
-        f.write(component_content)
+    write_text_atomic(component_path, component_content)
     
     return component_path
 
+def insert_before_sitemap_end(sitemap_path, new_entry):
+    """Заменяет закрывающий </urlset> на new_entry, перезаписывая только хвост файла"""
+    with open(sitemap_path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        tail_start = max(0, size - SITEMAP_TAIL_SIZE)
+        f.seek(tail_start)
+        tail = f.read()
+        
+        index = tail.rfind(SITEMAP_END_TAG)
+        if index == -1 and tail_start > 0:
+            # Тег не в хвосте (например, после него длинный комментарий): ищем по всему файлу
+            f.seek(0)
+            tail_start = 0
+            tail = f.read()
+            index = tail.rfind(SITEMAP_END_TAG)
+        if index == -1:
+            print(f"В {sitemap_path} нет закрывающего тега </urlset>, запись не добавлена")
+            return
+        
+        # Сохраняем то, что идет после тега (перевод строки в конце файла)
+        rest = tail[index + len(SITEMAP_END_TAG):]
+        f.seek(tail_start + index)
+        f.write(new_entry.encode('utf-8') + rest)
+        f.truncate()
+
 def update_seo_files(slug, optimized_data):
     """Обновляет SEO файлы (sitemap.xml, llms.txt)"""
     
     # Обновляем sitemap.xml
     sitemap_path = os.path.join(REACT_PROJECT_PATH, 'public', 'sitemap.xml')
     if os.path.exists(sitemap_path):
-        with open(sitemap_path, 'r', encoding='utf-8') as f:
-            sitemap_content = f.read()
-        
         # Добавляем новую запись перед закрывающим тегом
         new_entry = f'''  <url>
     <loc>https://call-intellect.ru/blog/{slug}</loc>
@@ -308,29 +572,37 @@ def update_seo_files(slug, optimized_data):
   </url>
 </urlset>'''
         
-        sitemap_content = sitemap_content.replace('</urlset>', new_entry)
-        
-        with open(sitemap_path, 'w', encoding='utf-8') as f:
-            f.write(sitemap_content)
+        insert_before_sitemap_end(sitemap_path, new_entry)
     
     # Обновляем llms.txt
     llms_path = os.path.join(REACT_PROJECT_PATH, 'public', 'llms.txt')
     if os.path.exists(llms_path):
-        with open(llms_path, 'r', encoding='utf-8') as f:
-            llms_content = f.read()
-        
         # Добавляем ссылку на новую статью в раздел блога
         blog_section = f"- [{optimized_data.get('title', 'Новая статья')}](/blog/{slug}): {optimized_data.get('description', '')[:100]}..."
+        # Общая блокировка с фоновой записью секции семантического ядра (routes/semantic.py)
+        with locked_file(llms_path):
+            insert_llms_blog_entry(llms_path, blog_section)
+
+def insert_llms_blog_entry(llms_path, blog_section):
+    """Вставляет ссылку сразу после заголовка раздела блога, перезаписывая только часть файла после него"""
+    entry = blog_section.encode('utf-8')
+    with open(llms_path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        index = -1
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                index = mm.find(LLMS_BLOG_HEADER)
         
-        if "## Blog Articles" in llms_content:
-            llms_content = llms_content.replace("## Blog Articles", f"## Blog Articles\\n{blog_section}")
-        else:
-            llms_content += f"\\n\\n## Blog Articles\\n{blog_section}"
+        if index == -1:
+            # Раздела еще нет: дописываем его в конец файла
+            f.write(b'\n\n' + LLMS_BLOG_HEADER + b'\n' + entry)
+            return
         
-        with open(llms_path, 'w', encoding='utf-8') as f:
-            f.write(llms_content)
-
-
+        insert_at = index + len(LLMS_BLOG_HEADER)
+        f.seek(insert_at)
+        rest = f.read()
+        f.seek(insert_at)
+        f.write(b'\n' + entry + rest)
 
 @seo_bp.route('/monitor-folder', methods=['POST'])
 def monitor_folder():
@@ -353,11 +625,24 @@ def monitor_folder():
         new_articles = scan_folder_for_articles(folder_path)
         
         results = []
+        articles = []
         for article_file in new_articles:
             try:
-                # Обрабатываем каждую найденную статью
-                result = process_article_file(article_file)
-                results.append(result)
+                title, content = read_article_file(article_file)
+                articles.append((article_file, title, content))
+            except Exception as e:
+                results.append({
+                    'file': article_file,
+                    'error': str(e)
+                })
+        
+        # Запросы к OpenAI для всех статей выполняются параллельно
+        optimized = asyncio.run(optimize_articles_async([(title, content) for _, title, content in articles])) if articles else []
+        
+        # Файлы проекта обновляем последовательно: статьи дописываются в общие sitemap.xml и llms.txt
+        for (article_file, title, content), optimized_data in zip(articles, optimized):
+            try:
+                results.append(publish_article(article_file, title, content, optimized_data))
             except Exception as e:
                 results.append({
                     'file': article_file,
@@ -377,47 +662,52 @@ def monitor_folder():
 
 def scan_folder_for_articles(folder_path):
     """Сканирует папку на наличие новых статей"""
-    article_files = []
+    candidates = []
+    legacy_processed = set()
     
-    for filename in os.listdir(folder_path):
-        if filename.endswith(('.md', '.txt')):
-            file_path = os.path.join(folder_path, filename)
-            # Проверяем, что файл не был обработан ранее
-            if not is_article_processed(file_path):
-                article_files.append(file_path)
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.processed'):
+                # Метки .processed от прежней схемы учета тоже считаются
+                legacy_processed.add(entry.name[:-len('.processed')])
+            elif entry.name.endswith(('.md', '.txt')) and entry.is_file():
+                candidates.append(entry.name)
     
-    return article_files
-
-def is_article_processed(file_path):
-    """Проверяет, была ли статья уже обработана"""
-    processed_file = file_path + '.processed'
-    return os.path.exists(processed_file)
+    # Проверяем, что файл не был обработан ранее: один запрос к манифесту на пакет путей
+    paths = [os.path.abspath(os.path.join(folder_path, filename)) for filename in candidates if filename not in legacy_processed]
+    processed = set()
+    for start in range(0, len(paths), PROCESSED_QUERY_BATCH_SIZE):
+        batch = paths[start:start + PROCESSED_QUERY_BATCH_SIZE]
+        processed.update(row.path for row in ProcessedArticle.query.filter(ProcessedArticle.path.in_(batch)))
+    
+    return [path for path in paths if path not in processed]
 
 def mark_article_as_processed(file_path):
     """Отмечает статью как обработанную"""
-    processed_file = file_path + '.processed'
-    with open(processed_file, 'w') as f:
-        f.write(datetime.now().isoformat())
+    db.session.merge(ProcessedArticle(path=os.path.abspath(file_path), processed_at=datetime.now().isoformat()))
+    db.session.commit()
 
-def process_article_file(file_path):
-    """Обрабатывает файл статьи"""
+def read_article_file(file_path):
+    """Читает файл статьи и возвращает (title, content)"""
     with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Извлекаем заголовок из первой строки или имени файла
-    lines = content.split('\\n')
-    title = lines[0].strip('#').strip() if lines and lines[0].startswith('#') else os.path.basename(file_path).replace('.md', '').replace('.txt', '')
-    
-    # Убираем заголовок из контента если он есть
-    if lines and lines[0].startswith('#'):
-        content = '\\n'.join(lines[1:]).strip()
+        # Для заголовка достаточно первой строки, весь файл не разбиваем на строки
+        first_line = f.readline()
+        
+        # Извлекаем заголовок из первой строки или имени файла, убирая его из контента
+        if first_line.startswith('#'):
+            title = first_line.strip('#').strip()
+            content = f.read().strip()
+        else:
+            title = os.path.basename(file_path).replace('.md', '').replace('.txt', '')
+            content = first_line + f.read()
     
+    return title, content
+
+def publish_article(file_path, title, content, optimized_data):
+    """Создает компонент и SEO-записи для оптимизированной статьи из файла"""
     # Генерируем slug
     slug = generate_slug(title)
     
-    # Оптимизируем контент
-    optimized_data = optimize_content_with_ai(title, content, '')
-    
     # Создаем компонент
     create_article_component(title, content, slug, optimized_data)
     
@@ -441,12 +731,21 @@ def schedule_monitoring():
     
     Ожидаемые данные:
     - folder_path: путь к папке для мониторинга
-    - interval_hours: интервал проверки в часах (по умолчанию 24)
+    - interval_hours: интервал проверки в часах, от 1 до 24 (по умолчанию 24)
     """
     try:
         data = request.get_json()
         folder_path = data.get('folder_path', '/tmp/articles')
-        interval_hours = data.get('interval_hours', 24)
+        
+        # Интервал попадает в системный файл cron: принимаем только целое число часов
+        try:
+            interval_hours = int(data.get('interval_hours', 24))
+        except (TypeError, ValueError):
+            interval_hours = None
+        if interval_hours is None or not 1 <= interval_hours <= 24:
+            return jsonify({
+                'error': 'interval_hours должен быть целым числом от 1 до 24'
+            }), 400
         
         # Создаем cron job для автоматического мониторинга
         create_monitoring_cron_job(folder_path, interval_hours)
@@ -462,8 +761,9 @@ def schedule_monitoring():
         }), 500
 
 def create_monitoring_cron_job(folder_path, interval_hours):
-    """Создает cron job для автоматического мониторинга"""
-    import subprocess
+    """Создает cron job для автоматического мониторинга (запись в /etc/cron.d требует прав root)"""
+    if not isinstance(interval_hours, int) or not 1 <= interval_hours <= 24:
+        raise ValueError('interval_hours должен быть целым числом от 1 до 24')
     
     # Создаем скрипт для мониторинга
     script_content = f'''#!/bin/bash
@@ -490,22 +790,10 @@ except Exception as e:
     # Делаем скрипт исполняемым
     os.chmod(script_path, 0o755)
     
-    # Добавляем в crontab
-    cron_entry = f'0 */{interval_hours} * * * {script_path}'
-    
-    # Получаем текущий crontab
-    try:
-        current_cron = subprocess.check_output(['crontab', '-l'], stderr=subprocess.DEVNULL).decode()
-    except subprocess.CalledProcessError:
-        current_cron = ''
-    
-    # Добавляем новую запись если её нет
-    if script_path not in current_cron:
-        new_cron = current_cron + f'\\n{cron_entry}\\n'
-        
-        # Записываем обновленный crontab
-        process = subprocess.Popen(['crontab', '-'], stdin=subprocess.PIPE)
-        process.communicate(new_cron.encode())
+    # Добавляем задание в /etc/cron.d: cron перечитывает каталог сам, без вызова crontab.
+    # Файл перезаписывается целиком, поэтому повторная настройка не создает дубликатов
+    user = pwd.getpwuid(os.geteuid()).pw_name
+    cron_entry = f'0 */{interval_hours} * * * {user} {script_path}\n'
+    write_text_atomic(CRON_FILE_PATH, cron_entry)
     
     return True
-
@@ -1,10 +1,15 @@
+import fcntl
+import hashlib
 import json
 import os
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Set
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from src.atomic_write import write_text_atomic
+
 class KeywordPriority(Enum):
     """Приоритеты ключевых слов"""
     LOW = "low"
@@ -23,6 +28,16 @@ class KeywordCluster(Enum):
     ANALYTICS = "analytics"    # Аналитика
     TRAINING = "training"      # Обучение
 
+# Элементы перечислений по значению: проверка входных данных без исключений
+KEYWORD_PRIORITIES = {priority.value: priority for priority in KeywordPriority}
+KEYWORD_CLUSTERS = {cluster.value: cluster for cluster in KeywordCluster}
+
+# Журнал компактизуется, когда он больше снимка в WAL_COMPACT_RATIO раз (но не меньше WAL_MIN_COMPACT_SIZE байт)
+WAL_COMPACT_RATIO = 4
+WAL_MIN_COMPACT_SIZE = 1 << 16
+# Размер блока при поиске конца последней целой записи журнала
+WAL_TAIL_CHUNK_SIZE = 1 << 16
+
 @dataclass
 class Keyword:
     """Модель ключевого слова"""
@@ -42,50 +57,406 @@ class Keyword:
             self.created_at = datetime.now().isoformat()
         if self.updated_at is None:
             self.updated_at = datetime.now().isoformat()
+        self.sync_enum_values()
+    
+    def sync_enum_values(self):
+        """Кеширование строковых значений кластера и приоритета (не поля dataclass)"""
+        self.cluster_value = self.cluster.value
+        self.priority_value = self.priority.value
+
+def _match_phrase_group(text: str, groups):
+    """Значение первой группы, ключевая фраза которой входит в текст, или None"""
+    for value, phrases in groups:
+        for phrase in phrases:
+            if phrase in text:
+                return value
+    return None
+
+# Ключевые фразы кластеров в порядке проверки
+_CLUSTER_KEYWORDS = (
+    # Технологические термины
+    (KeywordCluster.TECHNOLOGY, ('речевая аналитика', 'speech analytics', 'ai', 'искусственный интеллект',
+                                 'машинное обучение', 'нейросети', 'транскрибация', 'распознавание речи')),
+    # Отраслевые термины
+    (KeywordCluster.INDUSTRY, ('колл-центр', 'call center', 'контакт-центр', 'телефония',
+                               'клиентский сервис', 'продажи по телефону')),
+    # Функциональные возможности
+    (KeywordCluster.FUNCTIONAL, ('контроль качества', 'мониторинг звонков', 'анализ разговоров',
+                                 'оценка звонков', 'скрипты продаж', 'обучение менеджеров')),
+    # Проблемно-ориентированные
+    (KeywordCluster.PROBLEM, ('низкая конверсия', 'мусорные лиды', 'пропущенные звонки',
+                              'текучка менеджеров', 'падение продаж')),
+    # Интеграции
+    (KeywordCluster.INTEGRATION, ('битрикс24', 'amocrm', 'crm', 'интеграция', 'api', 'webhook')),
+    # Ценообразование
+    (KeywordCluster.PRICING, ('цена', 'стоимость', 'тариф', 'расчет', 'бюджет', 'roi')),
+    # Аналитика
+    (KeywordCluster.ANALYTICS, ('аналитика', 'отчеты', 'статистика', 'метрики', 'kpi', 'дашборд')),
+    # Обучение
+    (KeywordCluster.TRAINING, ('обучение', 'тренинг', 'курсы', 'семинар', 'вебинар', 'консультация'))
+)
+
+# Ключевые фразы приоритетов в порядке проверки
+_PRIORITY_KEYWORDS = (
+    # Критически важные запросы
+    (KeywordPriority.CRITICAL, ('речевая аналитика', 'speech analytics', 'контроль качества звонков',
+                                'анализ звонков', 'мониторинг звонков')),
+    # Высокоприоритетные запросы
+    (KeywordPriority.HIGH, ('купить', 'заказать', 'цена', 'стоимость', 'демо', 'презентация',
+                            'внедрение', 'интеграция')),
+    # Среднеприоритетные запросы
+    (KeywordPriority.MEDIUM, ('как', 'что такое', 'преимущества', 'возможности', 'функции'))
+)
+
+class _TrieNode:
+    """Узел сжатого префиксного дерева"""
+    __slots__ = ('label', 'children', 'ids')
+    
+    def __init__(self, label: str = ''):
+        self.label = label
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.ids: Set[str] = set()
+
+class PhraseTrie:
+    """Сжатое префиксное дерево (radix trie): фраза -> ID ключевых слов"""
+    
+    def __init__(self):
+        self._root = _TrieNode()
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __contains__(self, phrase: str) -> bool:
+        node = self._find(phrase)
+        return node is not None and bool(node.ids)
+    
+    def __iter__(self) -> Iterator[str]:
+        stack = [(self._root, '')]
+        while stack:
+            node, prefix = stack.pop()
+            if node.ids:
+                yield prefix
+            for child in node.children.values():
+                stack.append((child, prefix + child.label))
+    
+    def add(self, phrase: str, keyword_id: str):
+        """Добавление фразы с ID ключевого слова"""
+        node = self._root
+        i = 0
+        while i < len(phrase):
+            child = node.children.get(phrase[i])
+            if child is None:
+                child = _TrieNode(phrase[i:])
+                node.children[phrase[i]] = child
+                node = child
+                break
+            
+            # Длина общего префикса метки ребра и оставшейся части фразы
+            label = child.label
+            j = 1
+            limit = min(len(label), len(phrase) - i)
+            while j < limit and label[j] == phrase[i + j]:
+                j += 1
+            
+            if j < len(label):
+                # Разделяем ребро на общий префикс и остаток
+                middle = _TrieNode(label[:j])
+                child.label = label[j:]
+                middle.children[child.label[0]] = child
+                node.children[phrase[i]] = middle
+                child = middle
+            node = child
+            i += j
+        
+        if not node.ids:
+            self._size += 1
+        node.ids.add(keyword_id)
+    
+    def discard(self, phrase: str, keyword_id: str):
+        """Удаление ID ключевого слова у фразы"""
+        path = [self._root]
+        i = 0
+        while i < len(phrase):
+            child = path[-1].children.get(phrase[i])
+            if child is None or not phrase.startswith(child.label, i):
+                return
+            path.append(child)
+            i += len(child.label)
+        
+        node = path[-1]
+        if keyword_id not in node.ids:
+            return
+        node.ids.discard(keyword_id)
+        if node.ids:
+            return
+        self._size -= 1
+        
+        # Удаляем пустой лист и склеиваем узлы с единственным потомком
+        if not node.children and len(path) > 1:
+            del path[-2].children[node.label[0]]
+            path.pop()
+            node = path[-1]
+        if node is not self._root and not node.ids and len(node.children) == 1:
+            (child,) = node.children.values()
+            child.label = node.label + child.label
+            path[-2].children[child.label[0]] = child
+    
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        """ID ключевых слов, фразы которых начинаются с prefix"""
+        node = self._root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return
+            if child.label.startswith(prefix[i:]):
+                node = child
+                break
+            if not prefix.startswith(child.label, i):
+                return
+            node = child
+            i += len(child.label)
+        
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from node.ids
+            stack.extend(node.children.values())
+    
+    def _find(self, phrase: str) -> Optional[_TrieNode]:
+        node = self._root
+        i = 0
+        while i < len(phrase):
+            node = node.children.get(phrase[i])
+            if node is None or not phrase.startswith(node.label, i):
+                return None
+            i += len(node.label)
+        return node
 
 class SemanticCoreManager:
     """Менеджер семантического ядра"""
     
     def __init__(self, data_file: str = "semantic_core.json"):
         self.data_file = data_file
+        # Журнал изменений (JSONL): одна строка на мутацию, полный снимок пишется только при компактизации
+        self.wal_file = os.path.splitext(data_file)[0] + '.wal'
+        # Блокировка (flock) сериализует дозапись и компактизацию между воркерами gunicorn
+        self.lock_file = os.path.splitext(data_file)[0] + '.lock'
         self.keywords: Dict[str, Keyword] = {}
+        # Индекс фраз (casefold): проверка дубликатов и поиск по префиксу за O(длина фразы)
+        self.phrase_index = PhraseTrie()
+        # Активные ключевые слова по кластерам и приоритетам (dict как упорядоченное множество ID)
+        self._by_cluster: Dict[KeywordCluster, Dict[str, None]] = {}
+        self._by_priority: Dict[KeywordPriority, Dict[str, None]] = {}
+        self._reset_group_indexes()
+        # Счетчик изменений ядра, увеличивается при каждой мутации
+        self.version = 0
+        # Состояние файлов снимка и журнала на момент последней загрузки или записи
+        self._files_state = None
         self.load_keywords()
     
+    def refresh(self) -> bool:
+        """Перезагрузка ядра, если снимок или журнал изменены другим процессом"""
+        if self._get_files_state() == self._files_state:
+            return False
+        # Загружаем ядро в отдельный экземпляр и подменяем готовые структуры: фоновая запись
+        # SEO-файлов не должна увидеть частично загруженный набор ключевых слов
+        loaded = type(self)(self.data_file)
+        self.keywords = loaded.keywords
+        self.phrase_index = loaded.phrase_index
+        self._by_cluster = loaded._by_cluster
+        self._by_priority = loaded._by_priority
+        self._files_state = loaded._files_state
+        # Версия увеличивается только после подмены
+        self.version += 1
+        return True
+    
+    def _reset_group_indexes(self):
+        self._by_cluster = {cluster: {} for cluster in KeywordCluster}
+        self._by_priority = {priority: {} for priority in KeywordPriority}
+    
+    def _index_groups(self, keyword: Keyword):
+        if keyword.is_active:
+            self._by_cluster[keyword.cluster][keyword.id] = None
+            self._by_priority[keyword.priority][keyword.id] = None
+    
+    def _unindex_groups(self, keyword: Keyword):
+        self._by_cluster[keyword.cluster].pop(keyword.id, None)
+        self._by_priority[keyword.priority].pop(keyword.id, None)
+    
     def load_keywords(self):
-        """Загрузка ключевых слов из файла"""
-        if os.path.exists(self.data_file):
+        """Загрузка ключевых слов из снимка с последующим применением журнала"""
+        # Разделяемая блокировка: снимок и журнал не меняются во время чтения
+        with self._locked(fcntl.LOCK_SH):
+            self._files_state = self._get_files_state()
+            if os.path.exists(self.data_file):
+                try:
+                    with open(self.data_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                        for keyword_data in data.get('keywords', []):
+                            self._put_loaded_keyword(self._keyword_from_dict(keyword_data))
+                except Exception as e:
+                    print(f"Ошибка загрузки семантического ядра: {e}")
+            self._replay_wal()
+    
+    @contextmanager
+    def _locked(self, operation: int = fcntl.LOCK_EX):
+        """Блокировка файлов ядра; не реентерабельна - вложенные вызовы в одном процессе зависнут"""
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock.fileno(), operation)
             try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for keyword_data in data.get('keywords', []):
-                        keyword = Keyword(
-                            id=keyword_data['id'],
-                            phrase=keyword_data['phrase'],
-                            cluster=KeywordCluster(keyword_data['cluster']),
-                            priority=KeywordPriority(keyword_data['priority']),
-                            search_volume=keyword_data.get('search_volume'),
-                            competition=keyword_data.get('competition'),
-                            commercial_intent=keyword_data.get('commercial_intent'),
-                            created_at=keyword_data.get('created_at'),
-                            updated_at=keyword_data.get('updated_at'),
-                            is_active=keyword_data.get('is_active', True)
-                        )
-                        self.keywords[keyword.id] = keyword
-            except Exception as e:
-                print(f"Ошибка загрузки семантического ядра: {e}")
-    
-    def save_keywords(self):
-        """Сохранение ключевых слов в файл"""
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    
+    def _replay_wal(self):
+        """Применение записей журнала поверх загруженного снимка"""
+        try:
+            with open(self.wal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        if record['op'] == 'upsert':
+                            self._put_loaded_keyword(self._keyword_from_dict(record['kw']))
+                        elif record['op'] == 'delete':
+                            keyword = self.keywords.pop(record['id'], None)
+                            if keyword is not None:
+                                self.phrase_index.discard(keyword.phrase.casefold(), keyword.id)
+                                self._unindex_groups(keyword)
+                    except (ValueError, KeyError) as e:
+                        # Оборванная при сбое последняя строка не должна ломать загрузку
+                        print(f"Пропущена некорректная запись журнала семантического ядра: {e}")
+        except FileNotFoundError:
+            pass
+    
+    def _put_loaded_keyword(self, keyword: Keyword):
+        old_keyword = self.keywords.get(keyword.id)
+        if old_keyword is not None:
+            self.phrase_index.discard(old_keyword.phrase.casefold(), keyword.id)
+            self._unindex_groups(old_keyword)
+        self.keywords[keyword.id] = keyword
+        self.phrase_index.add(keyword.phrase.casefold(), keyword.id)
+        self._index_groups(keyword)
+    
+    @staticmethod
+    def _keyword_from_dict(keyword_data: Dict) -> Keyword:
+        return Keyword(
+            id=keyword_data['id'],
+            phrase=keyword_data['phrase'],
+            cluster=KEYWORD_CLUSTERS[keyword_data['cluster']],
+            priority=KEYWORD_PRIORITIES[keyword_data['priority']],
+            search_volume=keyword_data.get('search_volume'),
+            competition=keyword_data.get('competition'),
+            commercial_intent=keyword_data.get('commercial_intent'),
+            created_at=keyword_data.get('created_at'),
+            updated_at=keyword_data.get('updated_at'),
+            is_active=keyword_data.get('is_active', True)
+        )
+    
+    @staticmethod
+    def _keyword_to_dict(keyword: Keyword) -> Dict:
+        return {**asdict(keyword), 'cluster': keyword.cluster_value, 'priority': keyword.priority_value}
+    
+    def save_keywords(self) -> bool:
+        """Компактизация: запись полного снимка ядра и очистка журнала"""
+        with self._locked():
+            if self._get_files_state() != self._files_state:
+                # В файлах есть записи другого воркера, которых нет в памяти: снимок их потерял бы
+                return False
+            self._compact()
+            return True
+    
+    def _compact(self):
+        # Вызывается под эксклюзивной блокировкой и только когда память совпадает с файлами
         data = {
-            'keywords': [asdict(keyword) for keyword in self.keywords.values()],
+            'keywords': [self._keyword_to_dict(keyword) for keyword in self.keywords.values()],
             'last_updated': datetime.now().isoformat()
         }
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Без indent json использует C-кодировщик; строка записывается одним вызовом
+        write_text_atomic(self.data_file, json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+        # Журнал очищается после замены снимка: повторное применение его записей к новому снимку безопасно
+        open(self.wal_file, 'w').close()
+        self._files_state = self._get_files_state()
+    
+    def _append_wal(self, records: List[Dict]):
+        """Дозапись мутаций в журнал; компактизация, когда журнал сильно больше снимка"""
+        lines = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in records)
+        with self._locked():
+            # Состояние файлов до записи: совпадает с загруженным, только если других изменений не было
+            up_to_date = self._get_files_state() == self._files_state
+            with open(self.wal_file, 'a+b') as f:
+                # Оборванную при сбое последнюю запись отрезаем, иначе новая запись склеится с ней в одну битую строку
+                self._truncate_partial_record(f)
+                f.write(lines.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+                wal_size = f.tell()
+            
+            if not up_to_date:
+                # Состояние не обновляем: refresh() перечитает файлы вместе с записями другого воркера
+                # (и с этой записью); компактизация без них потеряла бы чужие изменения
+                return
+            
+            try:
+                snapshot_size = os.path.getsize(self.data_file)
+            except OSError:
+                snapshot_size = 0
+            if wal_size > max(WAL_COMPACT_RATIO * snapshot_size, WAL_MIN_COMPACT_SIZE):
+                self._compact()
+            else:
+                # Под блокировкой файлы после записи содержат ровно состояние в памяти
+                self._files_state = self._get_files_state()
+    
+    @staticmethod
+    def _truncate_partial_record(f):
+        """Обрезка журнала до последнего перевода строки (вызывается под эксклюзивной блокировкой)"""
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - WAL_TAIL_CHUNK_SIZE)
+            f.seek(start)
+            chunk = f.read(position - start)
+            if position == end and chunk.endswith(b'\n'):
+                return
+            index = chunk.rfind(b'\n')
+            if index != -1:
+                f.truncate(start + index + 1)
+                return
+            position = start
+        f.truncate(0)
+    
+    def _log_upserts(self, keywords: List[Keyword]):
+        self._append_wal([{'op': 'upsert', 'kw': self._keyword_to_dict(keyword)} for keyword in keywords])
+    
+    def _get_files_state(self):
+        """(mtime, размер) снимка и журнала; None для отсутствующего файла"""
+        state = []
+        for path in (self.data_file, self.wal_file):
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
     
     def add_keyword(self, phrase: str, cluster: KeywordCluster = None, 
                    priority: KeywordPriority = None, **kwargs) -> Keyword:
         """Добавление нового ключевого слова с автоматической группировкой и приоритизацией"""
+        keyword = self._create_keyword(phrase, cluster, priority, **kwargs)
+        self._log_upserts([keyword])
+        return keyword
+    
+    def add_keywords_bulk(self, rows: List[Dict]) -> List[Keyword]:
+        """Массовое добавление ключевых слов с однократной записью в журнал"""
+        added = [self._create_keyword(**row) for row in rows]
+        if added:
+            self._log_upserts(added)
+        return added
+    
+    def _create_keyword(self, phrase: str, cluster: KeywordCluster = None,
+                        priority: KeywordPriority = None, **kwargs) -> Keyword:
+        """Создание ключевого слова в памяти без сохранения в файл"""
         
         # Генерируем уникальный ID
         keyword_id = self._generate_keyword_id(phrase)
@@ -107,7 +478,9 @@ class SemanticCoreManager:
         )
         
         self.keywords[keyword_id] = keyword
-        self.save_keywords()
+        self.phrase_index.add(keyword.phrase.casefold(), keyword_id)
+        self._index_groups(keyword)
+        self.version += 1
         return keyword
     
     def update_keyword(self, keyword_id: str, **updates) -> Optional[Keyword]:
@@ -116,25 +489,37 @@ class SemanticCoreManager:
             return None
         
         keyword = self.keywords[keyword_id]
+        old_phrase = keyword.phrase
+        self._unindex_groups(keyword)
         
         # Обновляем поля
         for field, value in updates.items():
             if hasattr(keyword, field):
                 if field == 'cluster' and isinstance(value, str):
-                    value = KeywordCluster(value)
+                    value = KEYWORD_CLUSTERS[value]
                 elif field == 'priority' and isinstance(value, str):
-                    value = KeywordPriority(value)
+                    value = KEYWORD_PRIORITIES[value]
                 setattr(keyword, field, value)
+        keyword.sync_enum_values()
+        
+        if keyword.phrase != old_phrase:
+            self.phrase_index.discard(old_phrase.casefold(), keyword_id)
+            self.phrase_index.add(keyword.phrase.casefold(), keyword_id)
+        self._index_groups(keyword)
         
         keyword.updated_at = datetime.now().isoformat()
-        self.save_keywords()
+        self.version += 1
+        self._log_upserts([keyword])
         return keyword
     
     def delete_keyword(self, keyword_id: str) -> bool:
         """Удаление ключевого слова"""
         if keyword_id in self.keywords:
-            del self.keywords[keyword_id]
-            self.save_keywords()
+            keyword = self.keywords.pop(keyword_id)
+            self.phrase_index.discard(keyword.phrase.casefold(), keyword_id)
+            self._unindex_groups(keyword)
+            self.version += 1
+            self._append_wal([{'op': 'delete', 'id': keyword_id}])
             return True
         return False
     
@@ -144,17 +529,21 @@ class SemanticCoreManager:
     
     def get_keywords_by_cluster(self, cluster: KeywordCluster) -> List[Keyword]:
         """Получение ключевых слов по кластеру"""
-        return [kw for kw in self.keywords.values() if kw.cluster == cluster and kw.is_active]
+        return [self.keywords[keyword_id] for keyword_id in self._by_cluster[cluster]]
     
     def get_keywords_by_priority(self, priority: KeywordPriority) -> List[Keyword]:
         """Получение ключевых слов по приоритету"""
-        return [kw for kw in self.keywords.values() if kw.priority == priority and kw.is_active]
+        return [self.keywords[keyword_id] for keyword_id in self._by_priority[priority]]
     
     def get_all_keywords(self, active_only: bool = True) -> List[Keyword]:
         """Получение всех ключевых слов"""
+        return list(self.iter_all_keywords(active_only))
+    
+    def iter_all_keywords(self, active_only: bool = True) -> Iterator[Keyword]:
+        """Итерация по ключевым словам без построения промежуточного списка"""
         if active_only:
-            return [kw for kw in self.keywords.values() if kw.is_active]
-        return list(self.keywords.values())
+            return (kw for kw in self.keywords.values() if kw.is_active)
+        return iter(self.keywords.values())
     
     def search_keywords(self, query: str) -> List[Keyword]:
         """Поиск ключевых слов по фразе"""
@@ -162,98 +551,48 @@ class SemanticCoreManager:
         return [kw for kw in self.keywords.values() 
                 if query in kw.phrase.lower() and kw.is_active]
     
+    def search_keywords_by_prefix(self, prefix: str) -> List[Keyword]:
+        """Поиск ключевых слов, фразы которых начинаются с префикса"""
+        keywords = (self.keywords[i] for i in self.phrase_index.iter_prefix(prefix.casefold()))
+        return [kw for kw in keywords if kw.is_active]
+    
     def get_cluster_statistics(self) -> Dict[str, int]:
         """Статистика по кластерам"""
-        stats = {}
-        for cluster in KeywordCluster:
-            stats[cluster.value] = len(self.get_keywords_by_cluster(cluster))
-        return stats
+        return self.get_counts()['cluster_distribution']
+    
+    def get_counts(self) -> Dict:
+        """Сводная статистика по ядру по размерам индексов кластеров и приоритетов"""
+        cluster_stats = {cluster.value: len(ids) for cluster, ids in self._by_cluster.items()}
+        priority_stats = {priority.value: len(ids) for priority, ids in self._by_priority.items()}
+        active = sum(cluster_stats.values())
+        
+        return {
+            'total': len(self.keywords),
+            'active': active,
+            'inactive': len(self.keywords) - active,
+            'cluster_distribution': cluster_stats,
+            'priority_distribution': priority_stats
+        }
     
     def _generate_keyword_id(self, phrase: str) -> str:
         """Генерация уникального ID для ключевого слова"""
-        import hashlib
         base_id = phrase.lower().replace(' ', '_').replace('-', '_')
-        # Добавляем хеш для уникальности
-        hash_suffix = hashlib.md5(phrase.encode()).hexdigest()[:8]
+        # Добавляем хеш для уникальности (4 байта blake2b - те же 8 hex-символов, что раньше давал md5)
+        hash_suffix = hashlib.blake2b(phrase.encode('utf-8'), digest_size=4).hexdigest()
         return f"{base_id}_{hash_suffix}"
     
     def _auto_classify_cluster(self, phrase: str) -> KeywordCluster:
         """Автоматическая классификация ключевого слова по кластерам"""
-        phrase_lower = phrase.lower()
-        
-        # Технологические термины
-        tech_keywords = ['речевая аналитика', 'speech analytics', 'ai', 'искусственный интеллект', 
-                        'машинное обучение', 'нейросети', 'транскрибация', 'распознавание речи']
-        
-        # Отраслевые термины
-        industry_keywords = ['колл-центр', 'call center', 'контакт-центр', 'телефония', 
-                           'клиентский сервис', 'продажи по телефону']
-        
-        # Функциональные возможности
-        functional_keywords = ['контроль качества', 'мониторинг звонков', 'анализ разговоров',
-                             'оценка звонков', 'скрипты продаж', 'обучение менеджеров']
-        
-        # Проблемно-ориентированные
-        problem_keywords = ['низкая конверсия', 'мусорные лиды', 'пропущенные звонки',
-                          'текучка менеджеров', 'падение продаж']
-        
-        # Интеграции
-        integration_keywords = ['битрикс24', 'amocrm', 'crm', 'интеграция', 'api', 'webhook']
-        
-        # Ценообразование
-        pricing_keywords = ['цена', 'стоимость', 'тариф', 'расчет', 'бюджет', 'roi']
-        
-        # Аналитика
-        analytics_keywords = ['аналитика', 'отчеты', 'статистика', 'метрики', 'kpi', 'дашборд']
-        
-        # Обучение
-        training_keywords = ['обучение', 'тренинг', 'курсы', 'семинар', 'вебинар', 'консультация']
-        
-        # Проверяем соответствие кластерам
-        if any(keyword in phrase_lower for keyword in tech_keywords):
-            return KeywordCluster.TECHNOLOGY
-        elif any(keyword in phrase_lower for keyword in industry_keywords):
-            return KeywordCluster.INDUSTRY
-        elif any(keyword in phrase_lower for keyword in functional_keywords):
-            return KeywordCluster.FUNCTIONAL
-        elif any(keyword in phrase_lower for keyword in problem_keywords):
-            return KeywordCluster.PROBLEM
-        elif any(keyword in phrase_lower for keyword in integration_keywords):
-            return KeywordCluster.INTEGRATION
-        elif any(keyword in phrase_lower for keyword in pricing_keywords):
-            return KeywordCluster.PRICING
-        elif any(keyword in phrase_lower for keyword in analytics_keywords):
-            return KeywordCluster.ANALYTICS
-        elif any(keyword in phrase_lower for keyword in training_keywords):
-            return KeywordCluster.TRAINING
-        else:
-            # По умолчанию - функциональный кластер
-            return KeywordCluster.FUNCTIONAL
+        # По умолчанию - функциональный кластер
+        return _match_phrase_group(phrase.lower(), _CLUSTER_KEYWORDS) or KeywordCluster.FUNCTIONAL
     
     def _auto_prioritize(self, phrase: str, cluster: KeywordCluster) -> KeywordPriority:
         """Автоматическая приоритизация ключевого слова"""
-        phrase_lower = phrase.lower()
-        
-        # Критически важные запросы
-        critical_keywords = ['речевая аналитика', 'speech analytics', 'контроль качества звонков',
-                           'анализ звонков', 'мониторинг звонков']
+        priority = _match_phrase_group(phrase.lower(), _PRIORITY_KEYWORDS)
+        if priority is not None:
+            return priority
         
-        # Высокоприоритетные запросы
-        high_keywords = ['купить', 'заказать', 'цена', 'стоимость', 'демо', 'презентация',
-                        'внедрение', 'интеграция']
-        
-        # Среднеприоритетные запросы
-        medium_keywords = ['как', 'что такое', 'преимущества', 'возможности', 'функции']
-        
-        # Проверяем длину фразы (более длинные фразы обычно менее приоритетны)
-        word_count = len(phrase.split())
-        
-        if any(keyword in phrase_lower for keyword in critical_keywords):
-            return KeywordPriority.CRITICAL
-        elif any(keyword in phrase_lower for keyword in high_keywords):
-            return KeywordPriority.HIGH
-        elif any(keyword in phrase_lower for keyword in medium_keywords) or word_count <= 3:
+        # Короткие фразы (до 3 слов) обычно приоритетнее длинных
+        if len(phrase.split()) <= 3:
             return KeywordPriority.MEDIUM
-        else:
-            return KeywordPriority.LOW
-
+        return KeywordPriority.LOW